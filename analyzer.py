@@ -8,18 +8,191 @@ Author: Augment Agent
 Date: 2025-07-15
 """
 
+import os
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any
 import logging
 from utils import (
     get_field_aliases, detect_field_type, validate_required_fields,
-    convert_units, calculate_quadrant, get_quadrant_info,
+    convert_units, get_quadrant_info,
     safe_to_dict
 )
 
 logger = logging.getLogger(__name__)
 
+# Excel读取引擎：python-calamine（Rust实现）读取xlsx比openpyxl快数倍，
+# 可用时优先采用；缺失或pandas版本过低（<2.2）时沿用默认引擎
+try:
+    import python_calamine  # noqa: F401
+    _PANDAS_VERSION = tuple(int(part) for part in pd.__version__.split('.')[:2])
+    EXCEL_ENGINE = 'calamine' if _PANDAS_VERSION >= (2, 2) else None
+except ImportError:
+    EXCEL_ENGINE = None
+
+# 可选的polars多线程聚合：只在分组基数/行数大到能摊平转换成本时启用
+try:
+    import polars as pl
+    import pyarrow  # noqa: F401  polars与pandas的互转依赖pyarrow
+except ImportError:
+    pl = None
+
+POLARS_MIN_GROUPS = 2000
+POLARS_MIN_ROWS = 200_000
+
+# 字段检测结果缓存：同一文件/工作表在不同分析类型间重复探测是纯冗余，
+# 键包含文件修改时间和列名，文件更新后自动失效
+_FIELD_DETECTION_CACHE: Dict[tuple, Dict[str, Any]] = {}
+_FIELD_DETECTION_CACHE_MAX = 64
+
+# 超过该大小的xlsx用流式分块读取，峰值内存只与块大小相关而非整表行数
+STREAM_READ_THRESHOLD_BYTES = 20 * 1024 * 1024
+STREAM_CHUNK_ROWS = 20000
+
+# 流式读取需对齐pd.read_excel的默认NA解析：'N/A'/'NULL'等字符串标记按NaN处理，
+# 否则读取行为会随文件大小（走哪个读取器）而变化
+try:
+    from pandas.io.parsers.readers import STR_NA_VALUES as _EXCEL_NA_TOKENS
+except ImportError:  # pandas内部模块路径变动时退回同一份默认标记
+    _EXCEL_NA_TOKENS = {
+        '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+        '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+        'n/a', 'nan', 'null'
+    }
+
+# 各分析类型的固定映射表：提到模块级，避免热路径上每次调用重建字典
+_EFFICIENCY_FIELD_MAP = {
+    'product': 'quantity',  # 成本率 vs 销量
+    'customer': 'amount',   # 成本率 vs 采购金额
+    'region': 'amount'      # 成本率 vs 销售金额
+}
+
+_GROUP_FIELD_MAP = {
+    'product': 'product',
+    'customer': 'customer',
+    'region': 'region'
+}
+
+_EFFICIENCY_LABELS = {
+    'product': '销量(吨)',
+    'customer': '采购金额(万元)',
+    'region': '销售金额(万元)'
+}
+
+# 象限编码→标签：编码 = 高成本*2 + 低效率
+_EFFICIENCY_QUADRANT_LABELS = np.array(['efficient', 'low_volume', 'high_cost', 'inefficient'])
+
+# 分布分析的区间配置：边界是常量，提到模块级避免每次分析重建
+_DISTRIBUTION_INTERVAL_CONFIGS = {
+    'product': {
+        'primary_field': 'quantity',  # 主要分组字段
+        'value_field': 'amount',      # 价值字段
+        'intervals': [0, 5, 10, 20, 50, float('inf')],
+        'labels': ['<5吨', '5-10吨', '10-20吨', '20-50吨', '>50吨'],
+        'title': '销量分布区间分析',
+        'primary_label': '销量(吨)',
+        'value_label': '销售金额(万元)'
+    },
+    'customer': {
+        'primary_field': 'amount',
+        'value_field': 'amount',      # 对于客户分析，采购金额既是分组字段也是价值字段
+        'intervals': [0, 10, 50, 100, 500, float('inf')],
+        'labels': ['<10万', '10-50万', '50-100万', '100-500万', '>500万'],
+        'title': '采购金额分布区间分析',
+        'primary_label': '采购金额(万元)',
+        'value_label': '采购金额(万元)'
+    },
+    'region': {
+        'primary_field': 'amount',
+        'value_field': 'amount',
+        'intervals': [0, 50, 200, 500, 1000, float('inf')],
+        'labels': ['<50万', '50-200万', '200-500万', '500-1000万', '>1000万'],
+        'title': '销售金额分布区间分析',
+        'primary_label': '销售金额(万元)',
+        'value_label': '销售金额(万元)'
+    }
+}
+
+# searchsorted用的内边界数组也预先物化好，按配置只建一次
+for _config in _DISTRIBUTION_INTERVAL_CONFIGS.values():
+    _config['inner_bounds'] = np.asarray(_config['intervals'][1:-1], dtype='float64')
+del _config
+
+def _mask_na_tokens(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    把块内字符串形式的NA标记（'N/A'/'NULL'等）置为NaN，
+    并让pandas重推断列类型，与pd.read_excel的默认口径一致
+    """
+    for column in chunk.columns:
+        values = chunk[column]
+        # 文本列可能被推断成object或string dtype，两者都要清洗
+        if not (pd.api.types.is_object_dtype(values.dtype)
+                or pd.api.types.is_string_dtype(values.dtype)):
+            continue
+        token_mask = values.isin(_EXCEL_NA_TOKENS)
+        if token_mask.any():
+            chunk[column] = values.mask(token_mask)
+    return chunk.infer_objects(copy=False)
+
+def _read_excel_streaming(filepath: str, sheet_name: str, usecols: List[str] = None) -> pd.DataFrame:
+    """
+    以openpyxl只读模式逐行流式读取工作表，按块构建DataFrame后合并，
+    避免一次性物化整表带来的峰值内存开销
+
+    Args:
+        filepath: Excel文件路径
+        sheet_name: 工作表名称
+        usecols: 仅保留的列名列表（可选）
+
+    Returns:
+        pd.DataFrame: 读取到的数据
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+
+        columns = list(header)
+        keep_idx = None
+        if usecols is not None:
+            keep = set(usecols)
+            keep_idx = [i for i, col in enumerate(columns) if col in keep]
+            columns = [columns[i] for i in keep_idx]
+
+        chunks = []
+        buffer = []
+        for row in rows:
+            if keep_idx is not None:
+                row = tuple(row[i] for i in keep_idx)
+            buffer.append(row)
+            if len(buffer) >= STREAM_CHUNK_ROWS:
+                chunks.append(_mask_na_tokens(pd.DataFrame(buffer, columns=columns)))
+                buffer = []
+        if buffer:
+            chunks.append(_mask_na_tokens(pd.DataFrame(buffer, columns=columns)))
+
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        if len(chunks) == 1:
+            return chunks[0]
+        return pd.concat(chunks, ignore_index=True, copy=False)
+    finally:
+        workbook.close()
+
+def _convert_column(arr: np.ndarray, from_unit: str, to_unit: str) -> np.ndarray:
+    """
+    整列单位转换：系数通过convert_units解析一次，
+    乘法在连续的float64缓冲区上由C层一次完成
+    """
+    factor = convert_units(1.0, from_unit, to_unit)
+    return arr * factor
+
 class DataAnalyzer:
     """数据分析器类"""
     
@@ -37,14 +210,38 @@ class DataAnalyzer:
         self.processed_data = None
         self.field_mapping = {}
         self.unit_confirmations = {}
-        
+        # 分组列名解析缓存：analysis_type -> 列名，field_mapping确定后惰性填充
+        self._group_column_cache = {}
+
         # 加载数据
         self._load_data()
     
     def _load_data(self) -> None:
         """加载Excel数据"""
         try:
-            self.raw_data = pd.read_excel(self.filepath, sheet_name=self.sheet_name)
+            # 先只读表头：挑出能识别为已知字段类型的列，
+            # 未识别的列不再解析其单元格，宽表场景可大幅减少读取量
+            header = pd.read_excel(self.filepath, sheet_name=self.sheet_name,
+                                   nrows=0, engine=EXCEL_ENGINE)
+            usecols = [col for col in header.columns
+                       if detect_field_type(str(col).strip()) != 'unknown']
+            if not usecols or len(usecols) == len(header.columns):
+                # 没有可识别列（或全部可识别）时按整表读取
+                usecols = None
+
+            # 大文件且走openpyxl默认引擎时改用流式分块读取，控制峰值内存
+            use_streaming = (
+                EXCEL_ENGINE is None
+                and str(self.filepath).lower().endswith(('.xlsx', '.xlsm'))
+                and os.path.getsize(self.filepath) > STREAM_READ_THRESHOLD_BYTES
+            )
+
+            if use_streaming:
+                self.raw_data = _read_excel_streaming(self.filepath, self.sheet_name,
+                                                      usecols=usecols)
+            else:
+                self.raw_data = pd.read_excel(self.filepath, sheet_name=self.sheet_name,
+                                              usecols=usecols, engine=EXCEL_ENGINE)
 
             # 检查数据是否为空
             if self.raw_data.empty:
@@ -69,15 +266,34 @@ class DataAnalyzer:
         """
         if self.raw_data is None:
             raise ValueError("数据未加载")
-        
+
+        # 命中缓存时直接复用：每个HTTP请求都会新建分析器，缓存必须放在模块级
+        try:
+            mtime = os.path.getmtime(self.filepath)
+        except OSError:
+            mtime = None
+        cache_key = (self.filepath, mtime, self.sheet_name, tuple(self.raw_data.columns))
+        cached = _FIELD_DETECTION_CACHE.get(cache_key)
+        if cached is not None:
+            self.field_mapping = dict(cached['detected_fields'])
+            self._group_column_cache.clear()
+            return cached
+
         detected_fields = {}
         column_info = {}
-        
-        # 获取字段别名映射
+
+        # 获取字段别名映射，并倒排成 别名->优先级 索引，冲突裁决时O(1)查找
         aliases = get_field_aliases()
-        
-        # 检测每个列的字段类型
-        for column in self.raw_data.columns:
+        priority_map = {field_type: {name: idx for idx, name in enumerate(names)}
+                        for field_type, names in aliases.items()}
+
+        # 非空计数与dtype整表各取一次：count()对全部列只做一轮C层归约，
+        # 列循环里退化成纯字典取值，不再逐列触发独立扫描
+        non_null_counts = self.raw_data.count()
+        dtype_names = {column: str(dtype) for column, dtype in self.raw_data.dtypes.items()}
+
+        def _scan_column(column: str):
+            """单列探测：列间相互独立，dropna等pandas归约会释放GIL，可并行"""
             try:
                 field_type = detect_field_type(column)
 
@@ -90,21 +306,35 @@ class DataAnalyzer:
                 except Exception:
                     sample_values = []
 
-                column_info[column] = {
+                info = {
                     'field_type': field_type,
-                    'data_type': str(self.raw_data[column].dtype),
-                    'non_null_count': int(self.raw_data[column].count()),
+                    'data_type': dtype_names.get(column, 'unknown'),
+                    'non_null_count': int(non_null_counts[column]),
                     'sample_values': sample_values
                 }
             except Exception as e:
                 logger.warning(f"处理列 '{column}' 时出错: {str(e)}")
-                column_info[column] = {
+                field_type = 'unknown'
+                info = {
                     'field_type': 'unknown',
                     'data_type': 'unknown',
                     'non_null_count': 0,
                     'sample_values': []
                 }
-            
+            return column, field_type, info
+
+        # 宽表时并行扫描各列，窄表直接串行，避免线程池开销
+        columns = list(self.raw_data.columns)
+        if len(columns) > 8:
+            with ThreadPoolExecutor(max_workers=min(len(columns), os.cpu_count() or 1)) as executor:
+                scan_results = list(executor.map(_scan_column, columns))
+        else:
+            scan_results = [_scan_column(column) for column in columns]
+
+        # 串行汇总扫描结果（冲突裁决依赖别名优先级，必须有确定顺序）
+        for column, field_type, info in scan_results:
+            column_info[column] = info
+
             # 如果检测到已知字段类型，记录映射
             if field_type != 'unknown':
                 if field_type not in detected_fields:
@@ -112,27 +342,28 @@ class DataAnalyzer:
                 else:
                     # 如果有冲突，选择优先级更高的
                     current_column = detected_fields[field_type]
-                    try:
-                        current_priority = aliases[field_type].index(current_column)
-                    except (ValueError, KeyError):
-                        current_priority = 999
-
-                    try:
-                        new_priority = aliases[field_type].index(column)
-                    except (ValueError, KeyError):
-                        new_priority = 999
+                    type_priorities = priority_map.get(field_type, {})
+                    current_priority = type_priorities.get(current_column, 999)
+                    new_priority = type_priorities.get(column, 999)
 
                     if new_priority < current_priority:
                         detected_fields[field_type] = column
         
         self.field_mapping = detected_fields
-        
-        return {
+        self._group_column_cache.clear()
+
+        result = {
             'detected_fields': detected_fields,
             'column_info': column_info,
             'total_rows': len(self.raw_data),
             'total_columns': len(self.raw_data.columns)
         }
+
+        if len(_FIELD_DETECTION_CACHE) >= _FIELD_DETECTION_CACHE_MAX:
+            _FIELD_DETECTION_CACHE.clear()
+        _FIELD_DETECTION_CACHE[cache_key] = result
+
+        return result
     
     def validate_fields(self, analysis_type: str) -> Dict[str, Any]:
         """
@@ -152,81 +383,96 @@ class DataAnalyzer:
             'detected_fields': self.field_mapping
         }
     
-    def _apply_unit_conversions(self, data: pd.DataFrame) -> pd.DataFrame:
+    def _preprocess_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        应用单位转换
-        
+        数据预处理：单位转换与衍生指标计算融合为一次遍历，
+        转换后的列直接参与衍生指标计算，不再各自拷贝一遍数据
+
         Args:
             data: 原始数据
-            
+
         Returns:
-            pd.DataFrame: 转换后的数据
+            pd.DataFrame: 预处理后的数据（含转换后的单位和衍生指标列）
         """
-        converted_data = data.copy()
-        
+        # 浅拷贝即可：整列赋值只会替换副本中的列，原始数据不受影响
+        result_data = data.copy(deep=False)
+
         # 数量单位转换
         if 'quantity' in self.field_mapping and 'quantity' in self.unit_confirmations:
             quantity_col = self.field_mapping['quantity']
             from_unit = self.unit_confirmations['quantity']
-            
+
             if from_unit == 'kg':
-                # 转换为吨
-                converted_data[quantity_col] = converted_data[quantity_col].apply(
-                    lambda x: convert_units(x, 'kg', 't') if pd.notna(x) else x
+                # 转换为吨：整列批量转换，NaN自然保留
+                result_data[quantity_col] = _convert_column(
+                    result_data[quantity_col].to_numpy(dtype='float64'), 'kg', 't'
                 )
-        
+
         # 金额单位转换
         amount_fields = ['profit', 'amount']
         for field in amount_fields:
             if field in self.field_mapping and 'amount' in self.unit_confirmations:
                 amount_col = self.field_mapping[field]
                 from_unit = self.unit_confirmations['amount']
-                
+
                 if from_unit == 'yuan':
-                    # 转换为万元
-                    converted_data[amount_col] = converted_data[amount_col].apply(
-                        lambda x: convert_units(x, 'yuan', 'wan_yuan') if pd.notna(x) else x
+                    # 转换为万元：整列批量转换，NaN自然保留
+                    result_data[amount_col] = _convert_column(
+                        result_data[amount_col].to_numpy(dtype='float64'), 'yuan', 'wan_yuan'
                     )
-        
-        return converted_data
-    
-    def _calculate_derived_metrics(self, data: pd.DataFrame) -> pd.DataFrame:
-        """
-        计算衍生指标
-        
-        Args:
-            data: 数据
-            
-        Returns:
-            pd.DataFrame: 包含衍生指标的数据
-        """
-        result_data = data.copy()
-        
+
+        # 分组维度列转category：名称高度重复，字典编码省内存且加速后续groupby/等值比较
+        for field in ('product', 'customer', 'region'):
+            if field in self.field_mapping:
+                group_col = self.field_mapping[field]
+                if group_col in result_data.columns and result_data[group_col].dtype == object:
+                    result_data[group_col] = result_data[group_col].astype('category')
+
+        # 整数列无损降位（int64→int32/int16），减少后续聚合的内存带宽；
+        # 浮点列保持float64：金额类数据需要分位精度，float32的7位有效数字不够
+        numeric_fields = ['quantity', 'profit', 'amount'] + ['cost', 'sea_freight',
+                                                             'land_freight', 'agency_fee']
+        for field in numeric_fields:
+            if field in self.field_mapping:
+                column = self.field_mapping[field]
+                if column in result_data.columns and pd.api.types.is_integer_dtype(result_data[column]):
+                    result_data[column] = pd.to_numeric(result_data[column], downcast='integer')
+
         # 计算吨毛利（元/吨）
         if 'quantity' in self.field_mapping and 'profit' in self.field_mapping:
             quantity_col = self.field_mapping['quantity']
             profit_col = self.field_mapping['profit']
             
             # 吨毛利 = 毛利 / 数量 * 10000 (因为毛利是万元，数量是吨)
-            result_data['吨毛利'] = (result_data[profit_col] / result_data[quantity_col] * 10000).fillna(0)
-        
+            # 直接在ndarray上运算，免去Series算术的调度与fillna拷贝
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ton_profit = (result_data[profit_col].to_numpy(dtype='float64')
+                              / result_data[quantity_col].to_numpy(dtype='float64') * 10000)
+            ton_profit[np.isnan(ton_profit)] = 0
+            result_data['吨毛利'] = ton_profit
+
         # 计算总成本
         cost_fields = ['cost', 'sea_freight', 'land_freight', 'agency_fee']
         cost_columns = []
-        
+
         for field in cost_fields:
             if field in self.field_mapping:
                 cost_columns.append(self.field_mapping[field])
-        
+
         if cost_columns:
-            result_data['总成本'] = result_data[cost_columns].fillna(0).sum(axis=1)
-            
+            # nansum按行归约：NaN按0参与，省掉fillna整块中间帧
+            total_cost = np.nansum(result_data[cost_columns].to_numpy(dtype='float64'), axis=1)
+            result_data['总成本'] = total_cost
+
             # 计算成本率（限制在合理范围内）
             if 'amount' in self.field_mapping:
                 amount_col = self.field_mapping['amount']
                 # 计算成本率，避免除零错误，并限制在合理范围内
-                cost_rate = result_data['总成本'] / result_data[amount_col].replace(0, np.nan)
-                result_data['成本率'] = cost_rate.fillna(0).clip(0, 10)  # 限制成本率在0-10之间（1000%）
+                amount_arr = result_data[amount_col].to_numpy(dtype='float64')
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    cost_rate = total_cost / np.where(amount_arr == 0, np.nan, amount_arr)
+                cost_rate[np.isnan(cost_rate)] = 0
+                result_data['成本率'] = np.clip(cost_rate, 0, 10)  # 限制成本率在0-10之间（1000%）
         
         return result_data
     
@@ -276,30 +522,60 @@ class DataAnalyzer:
         if '总成本' in data.columns:
             agg_rules['总成本'] = 'sum'
         
-        # 执行聚合
-        aggregated = data.groupby(group_column).agg(agg_rules).reset_index()
+        # 执行聚合：as_index=False直接得到平铺结果，省去reset_index的一次拷贝；
+        # 高基数/大表场景下若安装了polars则改走其多线程哈希聚合
+        use_polars = (
+            pl is not None
+            and (len(data) > POLARS_MIN_ROWS
+                 or data[group_column].nunique() > POLARS_MIN_GROUPS)
+        )
+        if use_polars:
+            # pandas groupby默认丢弃NaN分组键，polars的group_by会保留null组；
+            # 先去掉空键，保证两个引擎聚合出完全一致的行集
+            subset = data[[group_column] + list(agg_rules)].dropna(subset=[group_column])
+            aggregated = (
+                pl.from_pandas(subset)
+                .group_by(group_column)
+                .agg([pl.col(column).sum() for column in agg_rules])
+                .to_pandas()
+                # polars输出无固定顺序，按分组键排序对齐pandas groupby的结果
+                .sort_values(group_column, ignore_index=True)
+            )
+        else:
+            # observed=True：分组列已是category时只聚合出现过的取值，避免空分组
+            aggregated = data.groupby(group_column, as_index=False, observed=True).agg(agg_rules)
         
-        # 重新计算衍生指标
+        # 重新计算衍生指标（与_preprocess_data同口径：直接在ndarray上融合计算）
         if 'quantity' in self.field_mapping and 'profit' in self.field_mapping:
             quantity_col = self.field_mapping['quantity']
             profit_col = self.field_mapping['profit']
-            aggregated['吨毛利'] = (aggregated[profit_col] / aggregated[quantity_col] * 10000).fillna(0)
-        
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ton_profit = (aggregated[profit_col].to_numpy(dtype='float64')
+                              / aggregated[quantity_col].to_numpy(dtype='float64') * 10000)
+            ton_profit[np.isnan(ton_profit)] = 0
+            aggregated['吨毛利'] = ton_profit
+
         if '总成本' in aggregated.columns and 'amount' in self.field_mapping:
             amount_col = self.field_mapping['amount']
             # 计算成本率，避免除零错误，并限制在合理范围内
-            cost_rate = aggregated['总成本'] / aggregated[amount_col].replace(0, np.nan)
-            aggregated['成本率'] = cost_rate.fillna(0).clip(0, 10)  # 限制成本率在0-10之间（1000%）
+            amount_arr = aggregated[amount_col].to_numpy(dtype='float64')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cost_rate = (aggregated['总成本'].to_numpy(dtype='float64')
+                             / np.where(amount_arr == 0, np.nan, amount_arr))
+            cost_rate[np.isnan(cost_rate)] = 0
+            aggregated['成本率'] = np.clip(cost_rate, 0, 10)  # 限制成本率在0-10之间（1000%）
         
         return aggregated
 
-    def _perform_quadrant_analysis(self, data: pd.DataFrame, analysis_type: str) -> Dict[str, Any]:
+    def _perform_quadrant_analysis(self, data: pd.DataFrame, analysis_type: str,
+                                   totals: Dict[str, float] = None) -> Dict[str, Any]:
         """
         执行四象限分析
 
         Args:
             data: 聚合后的数据
             analysis_type: 分析类型
+            totals: 预先计算的数值列总和（可选，缺省时现场计算）
 
         Returns:
             Dict[str, Any]: 四象限分析结果
@@ -352,14 +628,24 @@ class DataAnalyzer:
         # 计算平均值作为分割线
         x_avg = data[x_column].mean()
 
+        # 数值列总和只计算一次：优先复用analyze()传入的预计算值
+        totals = totals if totals is not None else {}
+
+        def _column_total(field: str) -> float:
+            if field not in self.field_mapping:
+                return 0
+            if field in totals:
+                return totals[field]
+            return data[self.field_mapping[field]].sum()
+
+        total_profit = _column_total('profit')
+        total_amount = _column_total('amount')
+        total_quantity = _column_total('quantity')
+
         # 对于按单品分析的吨毛利，需要特殊计算平均值
         if analysis_type == 'product' and config['y_field'] == '吨毛利':
             # 吨毛利平均值 = 毛利总和 / 数量总和 * 1000 (因为毛利是万元，数量是吨，转换为元/吨)
             if 'profit' in self.field_mapping and 'quantity' in self.field_mapping:
-                profit_col = self.field_mapping['profit']
-                quantity_col = self.field_mapping['quantity']
-                total_profit = data[profit_col].sum()
-                total_quantity = data[quantity_col].sum()
                 if total_quantity > 0:
                     y_avg = (total_profit / total_quantity) * 10000  # 万元转元，所以是10000而不是1000
                 else:
@@ -369,97 +655,127 @@ class DataAnalyzer:
         else:
             y_avg = data[y_column].mean()
 
-        # 为每个数据点分配象限
-        data['象限'] = data.apply(
-            lambda row: calculate_quadrant(row[x_column], row[y_column], x_avg, y_avg),
-            axis=1
+        # 为每个数据点分配象限（向量化布尔运算，判定逻辑与calculate_quadrant一致）
+        x_high = data[x_column].to_numpy() >= x_avg
+        y_high = data[y_column].to_numpy() >= y_avg
+        data['象限'] = np.where(
+            x_high & y_high, 1,
+            np.where(~x_high & y_high, 2, np.where(~x_high & ~y_high, 3, 4))
         )
 
         # 获取象限信息
         quadrant_info = get_quadrant_info(analysis_type)
 
-        # 为每个数据点添加象限名称
-        data['象限名称'] = data['象限'].map(lambda q: quadrant_info[q]['name'])
+        # 为每个数据点添加象限名称：象限号本身就是编码，直接from_codes建categorical，
+        # 名称只存一份字典表，免去map的逐值哈希查找
+        data['象限名称'] = pd.Categorical.from_codes(
+            data['象限'].to_numpy() - 1,
+            categories=[quadrant_info[q]['name'] for q in [1, 2, 3, 4]]
+        )
 
         # 计算总体统计数据
         total_count = len(data)
-        total_profit = data[self.field_mapping['profit']].sum() if 'profit' in self.field_mapping else 0
-        total_amount = data[self.field_mapping['amount']].sum() if 'amount' in self.field_mapping else 0
 
-        # 统计各象限数据
+        # 统计各象限数据：象限掩码基于同一ndarray一次性算好，避免逐象限重新比较整列
+        quadrant_ids = data['象限'].to_numpy()
+        quadrant_masks = {quadrant: quadrant_ids == quadrant for quadrant in [1, 2, 3, 4]}
+
+# Ensure the group field is included in scatter data output
+        group_column = self._get_group_column(analysis_type)
+        scatter_data_output = safe_to_dict(data)
+        # safe_to_dict按行序输出，分组值按位置一次回填，
+        # 替代此前每条记录都对data.index做整列扫描的O(N²)查找
+        if group_column in data.columns:
+            for item, group_value in zip(scatter_data_output, data[group_column].tolist()):
+                item['group'] = group_value
+
+        # 列名解析和列数组提取都放在象限循环外：
+        # 循环里只对ndarray做掩码求和，不再逐象限切DataFrame
+        profit_col = self.field_mapping.get('profit')
+        amount_col = self.field_mapping.get('amount')
+        quantity_col = self.field_mapping.get('quantity')
+        compute_ton_profit = (analysis_type == 'product'
+                              and profit_col is not None and quantity_col is not None)
+
+        # 每个数值列对整表只扫一趟：bincount按象限号一次得出四个象限的和，
+        # 替代逐象限掩码求和的四趟部分遍历（NaN按0参与，与nansum口径一致）
+        def _quadrant_sums(column: str):
+            if column is None:
+                return None
+            arr = data[column].to_numpy(dtype='float64')
+            return np.bincount(quadrant_ids, weights=np.nan_to_num(arr), minlength=5)
+
+        profit_sums = _quadrant_sums(profit_col)
+        amount_sums = _quadrant_sums(amount_col)
+        quantity_sums = _quadrant_sums(quantity_col)
+        quadrant_counts = np.bincount(quadrant_ids, minlength=5)
+
+        # 占比数组在循环外整批算好，循环内只做下标取值
+        def _percentages(sums, total):
+            if sums is None or not total > 0:
+                return None
+            return sums / total * 100
+
+        count_pcts = _percentages(quadrant_counts, total_count)
+        profit_pcts = _percentages(profit_sums, total_profit)
+        amount_pcts = _percentages(amount_sums, total_amount)
+        quantity_pcts = _percentages(quantity_sums, total_quantity)
+
         quadrant_stats = {}
         for quadrant in [1, 2, 3, 4]:
-            quadrant_data = data[data['象限'] == quadrant]
-            count = len(quadrant_data)
+            count = int(quadrant_counts[quadrant])
 
             # 计算各种占比和数量
-            count_percentage = (count / total_count * 100) if total_count > 0 else 0
+            count_percentage = count_pcts[quadrant] if count_pcts is not None else 0
 
             # 毛利贡献统计
-            profit_sum = quadrant_data[self.field_mapping['profit']].sum() if 'profit' in self.field_mapping else 0
-            profit_percentage = (profit_sum / total_profit * 100) if total_profit > 0 else 0
+            profit_sum = profit_sums[quadrant] if profit_sums is not None else 0
+            profit_percentage = profit_pcts[quadrant] if profit_pcts is not None else 0
 
             # 销售额统计
-            amount_sum = quadrant_data[self.field_mapping['amount']].sum() if 'amount' in self.field_mapping else 0
-            amount_percentage = (amount_sum / total_amount * 100) if total_amount > 0 else 0
+            amount_sum = amount_sums[quadrant] if amount_sums is not None else 0
+            amount_percentage = amount_pcts[quadrant] if amount_pcts is not None else 0
 
             # 数量统计（用于按单品分析）
-            quantity_sum = quadrant_data[self.field_mapping['quantity']].sum() if 'quantity' in self.field_mapping else 0
-            total_quantity = data[self.field_mapping['quantity']].sum() if 'quantity' in self.field_mapping else 0
-            quantity_percentage = (quantity_sum / total_quantity * 100) if total_quantity > 0 else 0
+            quantity_sum = quantity_sums[quadrant] if quantity_sums is not None else 0
+            quantity_percentage = quantity_pcts[quadrant] if quantity_pcts is not None else 0
 
             # 吨毛利计算（用于按单品分析）- 特殊计算方式
             ton_profit = 0
-            if analysis_type == 'product' and 'profit' in self.field_mapping and 'quantity' in self.field_mapping:
-                if quantity_sum > 0:
-                    ton_profit = (profit_sum / quantity_sum) * 10000  # 万元转元/吨
+            if compute_ton_profit and quantity_sum > 0:
+                ton_profit = (profit_sum / quantity_sum) * 10000  # 万元转元/吨
 
             quadrant_stats[quadrant] = {
                 'name': quadrant_info[quadrant]['name'],
                 'description': quadrant_info[quadrant]['description'],
                 'strategy': quadrant_info[quadrant]['strategy'],
                 'count': count,
-                'count_percentage': round(count_percentage, 0),
-                'profit_sum': round(profit_sum, 0),
-                'profit_percentage': round(profit_percentage, 0),
-                'amount_sum': round(amount_sum, 0),
-                'amount_percentage': round(amount_percentage, 0),
-                'quantity_sum': round(quantity_sum, 0),
-                'quantity_percentage': round(quantity_percentage, 0),
-                'ton_profit': round(ton_profit, 0),
-                'items': safe_to_dict(quadrant_data)
+                # 标量统一转回原生float：numpy标量会让下游JSON编码器走慢路径
+                'count_percentage': float(round(count_percentage, 0)),
+                'profit_sum': float(round(profit_sum, 0)),
+                'profit_percentage': float(round(profit_percentage, 0)),
+                'amount_sum': float(round(amount_sum, 0)),
+                'amount_percentage': float(round(amount_percentage, 0)),
+                'quantity_sum': float(round(quantity_sum, 0)),
+                'quantity_percentage': float(round(quantity_percentage, 0)),
+                'ton_profit': float(round(ton_profit, 0)),
+                # 复用整体散点payload的切片，避免对同一批行做第二次records转换
+                'items': [scatter_data_output[i]
+                          for i in np.flatnonzero(quadrant_masks[quadrant])]
             }
 
-# Ensure the group field is included in scatter data output
-        group_column = self._get_group_column(analysis_type)
-        scatter_data_output = safe_to_dict(data)
-        for item in scatter_data_output:
-            # Add the group field explicitly to each item
-            if group_column in data.columns:
-                # Find the corresponding row in the original data to get the group value
-                matching_rows = data[data.index == item.get('index', -1)]
-                if not matching_rows.empty:
-                    item['group'] = matching_rows.iloc[0][group_column]
-                elif group_column in item:
-                    item['group'] = item[group_column]
-                else:
-                    # 如果找不到匹配的行，尝试直接从item中获取group_column的值
-                    if group_column in item:
-                        item['group'] = item[group_column]
-                    else:
-                        # 最后尝试使用index作为group
-                        item['group'] = item.get('index', str(item))
-
         return {
             'scatter_data': scatter_data_output,
-            'x_avg': x_avg,
-            'y_avg': y_avg,
+            'x_avg': float(x_avg),
+            'y_avg': float(y_avg),
             'x_label': config['x_label'],
             'y_label': config['y_label'],
             'quadrant_stats': quadrant_stats
         }
 
-    def _perform_additional_analysis(self, data: pd.DataFrame, analysis_type: str, pareto_dimension: str = None) -> Dict[str, Any]:
+    def _perform_additional_analysis(self, data: pd.DataFrame, analysis_type: str,
+                                     pareto_dimension: str = None,
+                                     totals: Dict[str, float] = None) -> Dict[str, Any]:
         """
         执行额外的分析（帕累托、分布等）
 
@@ -467,6 +783,7 @@ class DataAnalyzer:
             data: 聚合后的数据
             analysis_type: 分析类型
             pareto_dimension: 帕累托分析维度
+            totals: 预先计算的数值列总和（可选）
 
         Returns:
             Dict[str, Any]: 额外分析结果
@@ -477,13 +794,15 @@ class DataAnalyzer:
         results['pareto_analysis'] = self._pareto_analysis(data, analysis_type, pareto_dimension)
 
         # 2. 分布区间分析
-        results['distribution_analysis'] = self._distribution_analysis(data, analysis_type)
+        results['distribution_analysis'] = self._distribution_analysis(data, analysis_type,
+                                                                       totals=totals)
 
         # 3. 盈亏分析
         results['profit_loss_analysis'] = self._profit_loss_analysis(data, analysis_type)
 
         # 4. 贡献度分析
-        results['contribution_analysis'] = self._contribution_analysis(data, analysis_type)
+        results['contribution_analysis'] = self._contribution_analysis(data, analysis_type,
+                                                                       totals=totals)
 
         # 5. 成本分析（如果有成本数据）
         if self._has_cost_data(data):
@@ -526,27 +845,29 @@ class DataAnalyzer:
         # 按指定字段降序排序
         sorted_data = data.sort_values(sort_column, ascending=False).reset_index(drop=True)
 
-        # 计算累计值和累计占比
-        total_value = sorted_data[sort_column].sum()
-        sorted_data['累计值'] = sorted_data[sort_column].cumsum()
-        sorted_data['累计占比'] = (sorted_data['累计值'] / total_value * 100).round(2)
-
-        # 找到80%的分界点
-        pareto_80_index = sorted_data[sorted_data['累计占比'] <= 80].index.max()
-        if pd.isna(pareto_80_index):
-            pareto_80_index = 0
+        # 计算累计值和累计占比：一条NumPy流水线完成，避免多次pandas级扫描
+        values = sorted_data[sort_column].to_numpy(dtype='float64')
+        total_value = values.sum()
+        cumulative = np.cumsum(values)
+        cumulative_pct = np.round(cumulative / total_value * 100, 2)
+        sorted_data['累计值'] = cumulative
+        sorted_data['累计占比'] = cumulative_pct
 
-        # 核心项目（贡献80%的项目）
-        core_items = sorted_data.iloc[:pareto_80_index + 1]
+        # 找到80%的分界点：累计占比在分界点前单调不减，用二分查找代替整列扫描
+        pareto_80_index = max(int(np.searchsorted(cumulative_pct, 80, side='right')) - 1, 0)
 
         # 获取维度标签和单位
         dimension_info = self._get_pareto_dimension_info(pareto_dimension, analysis_type)
 
+        # 核心项目（贡献80%的项目）是排序结果的前缀，直接切片records避免二次转换
+        pareto_records = safe_to_dict(sorted_data)
+        core_records = pareto_records[:pareto_80_index + 1]
+
         return {
-            'pareto_data': safe_to_dict(sorted_data),
-            'core_items': safe_to_dict(core_items),
-            'core_items_count': len(core_items),
-            'core_items_percentage': round(len(core_items) / len(sorted_data) * 100, 2),
+            'pareto_data': pareto_records,
+            'core_items': core_records,
+            'core_items_count': len(core_records),
+            'core_items_percentage': round(len(core_records) / len(sorted_data) * 100, 2),
             'total_items': len(sorted_data),
             'dimension': pareto_dimension,
             'dimension_info': dimension_info,
@@ -622,40 +943,16 @@ class DataAnalyzer:
                 'description': f'按{dimension}排序'
             }
 
-    def _distribution_analysis(self, data: pd.DataFrame, analysis_type: str) -> Dict[str, Any]:
-        """分布区间分析 - 升级版：提供双指标统计和价值维度分析"""
-        # 根据分析类型定义区间配置
-        interval_configs = {
-            'product': {
-                'primary_field': 'quantity',  # 主要分组字段
-                'value_field': 'amount',      # 价值字段
-                'intervals': [0, 5, 10, 20, 50, float('inf')],
-                'labels': ['<5吨', '5-10吨', '10-20吨', '20-50吨', '>50吨'],
-                'title': '销量分布区间分析',
-                'primary_label': '销量(吨)',
-                'value_label': '销售金额(万元)'
-            },
-            'customer': {
-                'primary_field': 'amount',
-                'value_field': 'amount',      # 对于客户分析，采购金额既是分组字段也是价值字段
-                'intervals': [0, 10, 50, 100, 500, float('inf')],
-                'labels': ['<10万', '10-50万', '50-100万', '100-500万', '>500万'],
-                'title': '采购金额分布区间分析',
-                'primary_label': '采购金额(万元)',
-                'value_label': '采购金额(万元)'
-            },
-            'region': {
-                'primary_field': 'amount',
-                'value_field': 'amount',
-                'intervals': [0, 50, 200, 500, 1000, float('inf')],
-                'labels': ['<50万', '50-200万', '200-500万', '500-1000万', '>1000万'],
-                'title': '销售金额分布区间分析',
-                'primary_label': '销售金额(万元)',
-                'value_label': '销售金额(万元)'
-            }
-        }
+    def _distribution_analysis(self, data: pd.DataFrame, analysis_type: str,
+                               totals: Dict[str, float] = None,
+                               include_raw: bool = False) -> Dict[str, Any]:
+        """分布区间分析 - 升级版：提供双指标统计和价值维度分析
 
-        config = interval_configs[analysis_type]
+        include_raw: 是否在结果中附带逐行的raw_data_with_intervals。该payload
+            没有任何前端/导出消费方，默认不再序列化；需要调试区间归属时可传True
+        """
+        # 区间配置为模块级常量（含预物化的searchsorted内边界）
+        config = _DISTRIBUTION_INTERVAL_CONFIGS[analysis_type]
 
         # 检查必需字段
         if config['primary_field'] not in self.field_mapping:
@@ -666,79 +963,107 @@ class DataAnalyzer:
         primary_column = self.field_mapping[config['primary_field']]
         value_column = self.field_mapping[config['value_field']]
 
-        # 创建区间分组，添加错误处理
-        try:
-            data['区间'] = pd.cut(data[primary_column],
-                               bins=config['intervals'],
-                               labels=config['labels'],
-                               right=False)
-        except ValueError as e:
-            print(f"分布区间分析失败: {e}")
-            print(f"字段: {primary_column}")
-            print(f"数据范围: {data[primary_column].min()} - {data[primary_column].max()}")
-            print(f"区间: {config['intervals']}")
-            raise ValueError(f"分布区间分析失败: {e}")
+        # 区间归属：区间边界是常量，用searchsorted+bincount一次算出各区间的
+        # 计数/总和/平均，省去pd.cut+groupby为个位数区间付出的调度开销
+        labels = config['labels']
+        intervals = config['intervals']
+        primary_arr = data[primary_column].to_numpy(dtype='float64')
+        inner_bounds = config['inner_bounds']
+        bin_idx = np.searchsorted(inner_bounds, primary_arr, side='right')
+        # 与pd.cut(right=False)语义一致：NaN或低于首边界的行不落入任何区间
+        valid = ~np.isnan(primary_arr) & (primary_arr >= intervals[0])
+        if np.isfinite(intervals[-1]):
+            valid &= primary_arr < intervals[-1]
+
+        counts = np.bincount(bin_idx[valid], minlength=len(labels))
+        primary_sums = np.bincount(bin_idx[valid], weights=primary_arr[valid],
+                                   minlength=len(labels))
+        primary_means = np.where(counts > 0, primary_sums / np.maximum(counts, 1), 0)
+
+        # 区间标签保留在局部数组中：写回data会把该列泄漏进后续
+        # 盈亏/贡献度等分析的输出payload里
+        interval_labels = np.full(len(primary_arr), None, dtype=object)
+        interval_labels[valid] = np.asarray(labels, dtype=object)[bin_idx[valid]]
 
         # 双指标统计：数量统计 + 价值统计
         if config['primary_field'] == config['value_field']:
-            # 当主要字段和价值字段相同时（如客户分析），只对一个字段进行聚合
-            interval_stats = data.groupby('区间', observed=False).agg({
-                primary_column: ['count', 'sum', 'mean']
-            }).round(2)
-            interval_stats.columns = ['项目数量', '价值总和', '价值平均']
+            # 当主要字段和价值字段相同时（如客户分析），只统计一个字段
+            value_sums = np.round(primary_sums, 2)
+            interval_stats_reset = pd.DataFrame({
+                '区间': labels,
+                '项目数量': counts,
+                '价值总和': value_sums,
+                '价值平均': np.round(primary_means, 2)
+            })
         else:
-            # 当主要字段和价值字段不同时（如产品分析），对两个字段分别聚合
-            interval_stats = data.groupby('区间', observed=False).agg({
-                primary_column: ['count', 'sum', 'mean'],
-                value_column: ['sum', 'mean']
-            }).round(2)
-            interval_stats.columns = ['项目数量', '主要指标总和', '主要指标平均', '价值总和', '价值平均']
-
-        # 处理空区间的NaN值
-        interval_stats = interval_stats.fillna(0)
+            # 当主要字段和价值字段不同时（如产品分析），对两个字段分别统计
+            value_arr = data[value_column].to_numpy(dtype='float64')
+            value_valid = valid & ~np.isnan(value_arr)
+            value_counts = np.bincount(bin_idx[value_valid], minlength=len(labels))
+            value_sums_raw = np.bincount(bin_idx[value_valid], weights=value_arr[value_valid],
+                                         minlength=len(labels))
+            value_means = np.where(value_counts > 0,
+                                   value_sums_raw / np.maximum(value_counts, 1), 0)
+            value_sums = np.round(value_sums_raw, 2)
+            interval_stats_reset = pd.DataFrame({
+                '区间': labels,
+                '项目数量': counts,
+                '主要指标总和': np.round(primary_sums, 2),
+                '主要指标平均': np.round(primary_means, 2),
+                '价值总和': value_sums,
+                '价值平均': np.round(value_means, 2)
+            })
 
-        # 计算百分比
+        # 计算百分比（价值列总和优先复用analyze()预计算结果）
         total_count = len(data)
-        total_value = data[value_column].sum()
+        if totals and config['value_field'] in totals:
+            total_value = totals[config['value_field']]
+        else:
+            total_value = data[value_column].sum()
 
-        interval_stats['数量占比'] = (interval_stats['项目数量'] / total_count * 100).round(1)
-        interval_stats['价值占比'] = (interval_stats['价值总和'] / total_value * 100).round(1)
+        # 两个占比列堆成2×K数组一次除法+round，省一半的ufunc调度
+        pct = np.round(np.stack([counts, value_sums])
+                       / np.array([[total_count], [total_value]], dtype='float64') * 100, 1)
+        interval_stats_reset['数量占比'] = pct[0]
+        interval_stats_reset['价值占比'] = pct[1]
 
         # 计算平均价值（价值总和 / 项目数量），避免除零错误
-        interval_stats['单项平均价值'] = interval_stats.apply(
-            lambda row: round(row['价值总和'] / row['项目数量'], 2) if row['项目数量'] > 0 else 0,
-            axis=1
+        interval_stats_reset['单项平均价值'] = np.where(
+            counts > 0, np.round(value_sums / np.maximum(counts, 1), 2), 0
         )
 
-        # 重置索引以便转换为字典
-        interval_stats_reset = interval_stats.reset_index()
-
-        # 为每个区间添加详细项目列表（用于下钻功能）
+        # 为每个区间添加详细项目列表（用于下钻功能）：
+        # 列数据整批round+tolist一次备好，按价值对全表做一次稳定降序排序，
+        # 再用区间标签切分索引，替代逐区间iterrows逐行拼字典
         interval_details = {}
         group_column = self._get_group_column(analysis_type)
 
+        name_list = data[group_column].to_numpy().tolist()
+        # 保留Python round语义（与np.round在个别边界值上结果不同）
+        primary_list = [round(value, 2) for value in primary_arr.tolist()]
+        value_list = [round(value, 2)
+                      for value in data[value_column].to_numpy(dtype='float64').tolist()]
+        profit_column = self.field_mapping.get('profit')
+        profit_list = ([round(value, 2)
+                        for value in data[profit_column].to_numpy(dtype='float64').tolist()]
+                       if profit_column is not None else None)
+
+        # 排序键用round后的价值，和原先先拼字典再按value排序的口径一致
+        value_order = np.argsort(-np.asarray(value_list, dtype='float64'), kind='stable')
         for interval_name in config['labels']:
-            interval_data = data[data['区间'] == interval_name]
-            if not interval_data.empty:
-                # 获取该区间的所有项目详情
-                items = []
-                for _, row in interval_data.iterrows():
-                    item = {
-                        'name': row[group_column],
-                        'primary_value': round(row[primary_column], 2),
-                        'value': round(row[value_column], 2)
-                    }
-                    # 添加其他有用字段
-                    if 'profit' in self.field_mapping:
-                        item['profit'] = round(row[self.field_mapping['profit']], 2)
-                    items.append(item)
-
-                # 按价值降序排序
-                items.sort(key=lambda x: x['value'], reverse=True)
-                interval_details[interval_name] = items
+            ordered_idx = value_order[interval_labels[value_order] == interval_name]
+            if profit_list is not None:
+                interval_details[interval_name] = [
+                    {'name': name_list[i], 'primary_value': primary_list[i],
+                     'value': value_list[i], 'profit': profit_list[i]}
+                    for i in ordered_idx
+                ]
             else:
-                # 为空区间也创建空列表，保持数据结构一致性
-                interval_details[interval_name] = []
+                interval_details[interval_name] = [
+                    {'name': name_list[i], 'primary_value': primary_list[i],
+                     'value': value_list[i]}
+                    for i in ordered_idx
+                ]
 
         return {
             'title': config['title'],
@@ -747,13 +1072,14 @@ class DataAnalyzer:
             'interval_data': safe_to_dict(interval_stats_reset),
             'interval_details': interval_details,
             'total_count': total_count,
-            'total_value': round(total_value, 2),
+            'total_value': float(round(total_value, 2)),
             'analysis_summary': {
                 'highest_count_interval': interval_stats_reset.loc[interval_stats_reset['项目数量'].idxmax(), '区间'],
                 'highest_value_interval': interval_stats_reset.loc[interval_stats_reset['价值总和'].idxmax(), '区间'],
-                'avg_value_per_item': round(total_value / total_count, 2)
+                'avg_value_per_item': float(round(total_value / total_count, 2))
             },
-            'raw_data_with_intervals': safe_to_dict(data)
+            'raw_data_with_intervals': (safe_to_dict(data.assign(区间=interval_labels))
+                                        if include_raw else [])
         }
 
     def _profit_loss_analysis(self, data: pd.DataFrame, analysis_type: str) -> Dict[str, Any]:
@@ -770,53 +1096,49 @@ class DataAnalyzer:
             # 对于客户和地区分析，使用总毛利作为判断标准
             profit_criterion_column = profit_column
 
-        # 分离盈利和亏损数据
-        profitable = data[data[profit_criterion_column] > 0]
-        loss_making = data[data[profit_criterion_column] <= 0]
-
-        # 强制调试：将信息写入文件
-        import os
-        debug_file = os.path.join(os.path.dirname(__file__), 'profit_loss_debug.txt')
-        with open(debug_file, 'w', encoding='utf-8') as f:
-            f.write(f"=== 盈亏分析调试信息 ===\n")
-            f.write(f"分析类型: {analysis_type}\n")
-            f.write(f"判断字段: {profit_criterion_column}\n")
-            f.write(f"数据总数: {len(data)}\n")
-            f.write(f"盈利项目数: {len(profitable)}\n")
-            f.write(f"亏损项目数: {len(loss_making)}\n")
-
-            # 查找包含"春雪"或"小酥肉"的产品
+        # 分离盈利和亏损数据：判断列只扫描一次，两侧共用同一掩码
+        profitable_mask = data[profit_criterion_column].to_numpy() > 0
+        profitable = data[profitable_mask]
+        loss_making = data[~profitable_mask]
+
+        # 调试信息只在DEBUG级别输出：默认路径不做磁盘IO，也不逐行遍历数据
+        if logger.isEnabledFor(logging.DEBUG):
+            debug_file = os.path.join(os.path.dirname(__file__), 'profit_loss_debug.txt')
             group_col = self._get_group_column(analysis_type)
-            chunxue_mask = data[group_col].str.contains('春雪|小酥肉', na=False, case=False)
-            if chunxue_mask.any():
-                f.write("找到春雪相关产品:\n")
-                for idx, row in data[chunxue_mask].iterrows():
-                    product_name = row[group_col]
-                    criterion_value = row[profit_criterion_column]
-                    profit_value = row[profit_column]
-                    is_profitable = criterion_value > 0
-                    f.write(f"  - {product_name}: {profit_criterion_column}={criterion_value}, 毛利={profit_value}, 分类={'盈利' if is_profitable else '亏损'}\n")
-            else:
-                f.write("未找到春雪相关产品，显示前5个产品:\n")
-                for idx, row in data.head(5).iterrows():
-                    product_name = row[group_col]
-                    criterion_value = row[profit_criterion_column]
-                    profit_value = row[profit_column]
-                    is_profitable = criterion_value > 0
-                    f.write(f"  - {product_name}: {profit_criterion_column}={criterion_value}, 毛利={profit_value}, 分类={'盈利' if is_profitable else '亏损'}\n")
-            f.write("========================\n")
+            chunxue_mask = data[group_col].astype(str).str.contains('春雪|小酥肉', na=False, case=False)
+            found = bool(chunxue_mask.any())
+            sample = data[chunxue_mask] if found else data.head(5)
+            detail = sample[[group_col, profit_criterion_column, profit_column]].assign(
+                分类=np.where(sample[profit_criterion_column] > 0, '盈利', '亏损')
+            )
+            # 整段先拼好再一次写出，避免多次f.write各自过一遍缓冲区锁
+            debug_text = "\n".join([
+                "=== 盈亏分析调试信息 ===",
+                f"分析类型: {analysis_type}",
+                f"判断字段: {profit_criterion_column}",
+                f"数据总数: {len(data)}",
+                f"盈利项目数: {len(profitable)}",
+                f"亏损项目数: {len(loss_making)}",
+                "找到春雪相关产品:" if found else "未找到春雪相关产品，显示前5个产品:",
+                detail.to_string(index=False),
+                "========================\n",
+            ])
+            with open(debug_file, 'w', encoding='utf-8') as f:
+                f.write(debug_text)
 
         # 统计信息
         total_count = len(data)
-        profitable_count = len(profitable)
-        loss_count = len(loss_making)
+        profitable_count = int(profitable_mask.sum())
+        loss_count = total_count - profitable_count
 
         profitable_percentage = round(profitable_count / total_count * 100, 2) if total_count > 0 else 0
         loss_percentage = round(loss_count / total_count * 100, 2) if total_count > 0 else 0
 
         # 盈亏金额统计 - 始终使用总毛利进行金额统计，但分类使用对应的标准
-        total_profit = profitable[profit_column].sum() if len(profitable) > 0 else 0
-        total_loss = abs(loss_making[profit_column].sum()) if len(loss_making) > 0 else 0
+        # 金额列只提取一次，两侧求和复用同一数组（nansum保持pandas跳过NaN的语义）
+        profit_arr = data[profit_column].to_numpy(dtype=np.float64)
+        total_profit = float(np.nansum(profit_arr[profitable_mask]))
+        total_loss = abs(float(np.nansum(profit_arr[~profitable_mask])))
         net_profit = total_profit - total_loss
 
 # Ensure the group field is included in profit/loss item output
@@ -824,39 +1146,13 @@ class DataAnalyzer:
         profitable_output = safe_to_dict(profitable)
         loss_making_output = safe_to_dict(loss_making)
 
-        # Add group field to profitable items
-        for item in profitable_output:
-            if group_column in profitable.columns:
-                # Find the corresponding row to get the group value
-                matching_rows = profitable[profitable.index == item.get('index', -1)]
-                if not matching_rows.empty:
-                    item['group'] = matching_rows.iloc[0][group_column]
-                elif group_column in item:
-                    item['group'] = item[group_column]
-                else:
-                    # 如果找不到匹配的行，尝试直接从item中获取group_column的值
-                    if group_column in item:
-                        item['group'] = item[group_column]
-                    else:
-                        # 最后尝试使用index作为group
-                        item['group'] = item.get('index', str(item))
-
-        # Add group field to loss-making items
-        for item in loss_making_output:
-            if group_column in loss_making.columns:
-                # Find the corresponding row to get the group value
-                matching_rows = loss_making[loss_making.index == item.get('index', -1)]
-                if not matching_rows.empty:
-                    item['group'] = matching_rows.iloc[0][group_column]
-                elif group_column in item:
-                    item['group'] = item[group_column]
-                else:
-                    # 如果找不到匹配的行，尝试直接从item中获取group_column的值
-                    if group_column in item:
-                        item['group'] = item[group_column]
-                    else:
-                        # 最后尝试使用index作为group
-                        item['group'] = item.get('index', str(item))
+        # 记录与行序一一对应，分组值按位置回填，
+        # 替代原先每条记录对index做整列布尔扫描的O(N²)查找
+        if group_column in data.columns:
+            for item, group_value in zip(profitable_output, profitable[group_column].tolist()):
+                item['group'] = group_value
+            for item, group_value in zip(loss_making_output, loss_making[group_column].tolist()):
+                item['group'] = group_value
 
         return {
             'summary': {
@@ -873,7 +1169,8 @@ class DataAnalyzer:
             'loss_making_items': loss_making_output
         }
 
-    def _contribution_analysis(self, data: pd.DataFrame, analysis_type: str) -> Dict[str, Any]:
+    def _contribution_analysis(self, data: pd.DataFrame, analysis_type: str,
+                               totals: Dict[str, float] = None) -> Dict[str, Any]:
         """贡献度分析"""
         # 根据分析类型选择分析字段
         analysis_fields = {
@@ -888,22 +1185,37 @@ class DataAnalyzer:
         for field in fields:
             if field in self.field_mapping:
                 column = self.field_mapping[field]
-                total_value = data[column].sum()
-
-                # 计算每项的贡献度
-                data[f'{field}_contribution'] = (data[column] / total_value * 100).round(2)
-
-                # 排序并获取前10名
-                top_contributors = data.nlargest(10, column)
+                arr = data[column].to_numpy(dtype='float64')
+                if totals and field in totals:
+                    total_value = totals[field]
+                else:
+                    total_value = np.nansum(arr)
+
+                # 前10名用argpartition选出（O(N)），只对这10个做排序；
+                # NaN按-inf处理，与nlargest一样排除在前列之外
+                valid_count = int(np.count_nonzero(~np.isnan(arr)))
+                k = min(10, valid_count)
+                if k > 0:
+                    selection_key = np.where(np.isnan(arr), -np.inf, arr)
+                    top_idx = np.argpartition(selection_key, -k)[-k:]
+                    top_idx = top_idx[np.argsort(-selection_key[top_idx], kind='stable')]
+                    # 贡献度只对返回的前10行计算，不再向共享frame写入整列，
+                    # 避免贡献度列泄漏进其他分析的payload
+                    top_contributors = data.iloc[top_idx].assign(**{
+                        f'{field}_contribution': np.round(arr[top_idx] / total_value * 100, 2)
+                    })
+                else:
+                    top_contributors = data.iloc[:0]
 
                 contribution_data[field] = {
-                    'total_value': round(total_value, 2),
+                    'total_value': float(round(total_value, 2)),
                     'top_contributors': safe_to_dict(top_contributors)
                 }
 
         return contribution_data
 
-    def analyze(self, analysis_type: str, unit_confirmations: Dict[str, str], pareto_dimension: str = None) -> Dict[str, Any]:
+    def analyze(self, analysis_type: str, unit_confirmations: Dict[str, str], pareto_dimension: str = None,
+                serialize_rows: bool = True) -> Dict[str, Any]:
         """
         执行完整的数据分析
 
@@ -911,6 +1223,10 @@ class DataAnalyzer:
             analysis_type: 分析类型 ('product', 'customer', 'region')
             unit_confirmations: 单位确认信息
             pareto_dimension: 帕累托分析维度 ('profit', 'amount', 'quantity')
+            serialize_rows: 是否把行级processed_data序列化进结果。该步骤是
+                O(行数×列数)的Python对象构造，只有Excel导出用到；只取汇总/
+                图表结果的调用方可传False跳过（processed_data返回空列表，
+                完整frame仍保存在self.processed_data上）
 
         Returns:
             Dict[str, Any]: 完整的分析结果
@@ -925,9 +1241,8 @@ class DataAnalyzer:
         if not field_validation['is_valid']:
             raise ValueError(f"缺少必需字段: {field_validation['missing_fields']}")
 
-        # 3. 数据预处理
-        processed_data = self._apply_unit_conversions(self.raw_data)
-        processed_data = self._calculate_derived_metrics(processed_data)
+        # 3. 数据预处理（单位转换与衍生指标在同一次遍历中完成）
+        processed_data = self._preprocess_data(self.raw_data)
 
         # 保存处理后的数据到实例属性
         self.processed_data = processed_data
@@ -935,11 +1250,22 @@ class DataAnalyzer:
         # 4. 数据聚合
         aggregated_data = self._aggregate_data(processed_data, analysis_type)
 
+        # 预先计算各数值列总和，供后续分析复用，避免重复整列扫描
+        column_totals = {
+            field: aggregated_data[self.field_mapping[field]].sum()
+            for field in ('profit', 'amount', 'quantity')
+            if field in self.field_mapping
+        }
+
         # 5. 四象限分析
-        quadrant_analysis = self._perform_quadrant_analysis(aggregated_data, analysis_type)
+        quadrant_analysis = self._perform_quadrant_analysis(
+            aggregated_data, analysis_type, totals=column_totals
+        )
 
         # 6. 其他分析（帕累托、分布等）
-        additional_analysis = self._perform_additional_analysis(aggregated_data, analysis_type, pareto_dimension)
+        additional_analysis = self._perform_additional_analysis(
+            aggregated_data, analysis_type, pareto_dimension, totals=column_totals
+        )
 
         return {
             'field_detection': field_detection,
@@ -948,7 +1274,7 @@ class DataAnalyzer:
                 'total_rows': len(self.raw_data),
                 'total_columns': len(self.raw_data.columns)
             },
-            'processed_data': safe_to_dict(processed_data),
+            'processed_data': safe_to_dict(processed_data) if serialize_rows else [],
             'aggregated_data': safe_to_dict(aggregated_data),
             'quadrant_analysis': quadrant_analysis,
             'additional_analysis': additional_analysis,
@@ -990,20 +1316,21 @@ class DataAnalyzer:
             'agency_fee': '代办费'
         }
 
-        composition_data = []
-        total_cost = 0
-
-        for field_key, field_name in cost_fields.items():
-            if field_key in self.field_mapping:
-                field_column = self.field_mapping[field_key]
-                if field_column in data.columns:
-                    field_sum = data[field_column].sum()
-                    composition_data.append({
-                        'name': field_name,
-                        'value': field_sum,
-                        'field': field_key
-                    })
-                    total_cost += field_sum
+        # 现存的成本列一次性选出后整块求和，不再逐列触发独立的归约调用
+        present = [
+            (self.field_mapping[field_key], field_name, field_key)
+            for field_key, field_name in cost_fields.items()
+            if field_key in self.field_mapping and self.field_mapping[field_key] in data.columns
+        ]
+        sums = ([float(value) for value in
+                 data[[column for column, _, _ in present]].sum().to_numpy(dtype='float64')]
+                if present else [])
+        total_cost = sum(sums, 0)
+
+        composition_data = [
+            {'name': field_name, 'value': field_sum, 'field': field_key}
+            for (_, field_name, field_key), field_sum in zip(present, sums)
+        ]
 
         # 计算占比
         for item in composition_data:
@@ -1031,6 +1358,18 @@ class DataAnalyzer:
         # 获取可用的价值字段
         value_fields = self._get_available_value_fields(data)
 
+        # 各价值列的全列总和只算一次：每种划分方法的区间统计共用同一批总和
+        col_sums = {
+            field['column']: float(np.nansum(data[field['column']].to_numpy(dtype='float64')))
+            for field in value_fields
+            if 'column' in field and field['column'] in data.columns
+        }
+
+        # 极值只算一次：每种划分方法的range展示都复用，不再逐次min/max归约
+        min_rate = cost_rates.min()
+        max_rate = cost_rates.max()
+        rate_range = f'{min_rate:.1%} - {max_rate:.1%}'
+
         # 动态计算区间：支持多种划分方法
         intervals_config = self._calculate_dynamic_intervals(cost_rates)
 
@@ -1042,16 +1381,16 @@ class DataAnalyzer:
 
             # 创建区间分组，添加错误处理
             try:
-                cost_rate_intervals = pd.cut(cost_rates, bins=intervals, labels=labels, right=False, include_lowest=True)
+                cost_rate_intervals = self._bin_cost_rates(cost_rates, intervals, labels)
             except ValueError as e:
                 print(f"区间划分失败 ({method_name}): {e}")
                 print(f"区间: {intervals}")
-                print(f"成本率范围: {cost_rates.min()} - {cost_rates.max()}")
+                print(f"成本率范围: {min_rate} - {max_rate}")
                 continue  # 跳过这个划分方法
 
             # 统计各区间的多维度数据
             distribution_data, value_distribution_data, interval_details = self._calculate_interval_statistics(
-                data, cost_rate_intervals, value_fields, intervals_data['method_type']
+                data, cost_rate_intervals, value_fields, intervals_data['method_type'], col_sums
             )
 
             division_methods.append({
@@ -1062,9 +1401,10 @@ class DataAnalyzer:
                 'value_distribution_data': value_distribution_data,
                 'interval_details': interval_details,
                 'intervals_info': {
-                    'intervals': intervals,
+                    # 区间端点来自quantile等numpy标量，转原生float便于JSON编码
+                    'intervals': [float(value) for value in intervals],
                     'labels': labels,
-                    'range': f'{cost_rates.min():.1%} - {cost_rates.max():.1%}'
+                    'range': rate_range
                 }
             })
 
@@ -1075,10 +1415,7 @@ class DataAnalyzer:
             default_labels = ['<50%', '≥50%']
 
             try:
-                # 调整默认区间以适应实际数据范围
-                min_rate = cost_rates.min()
-                max_rate = cost_rates.max()
-
+                # 调整默认区间以适应实际数据范围（极值已在前面算好）
                 if min_rate >= 0.5:
                     # 如果所有数据都大于50%，调整区间
                     mid_point = (min_rate + max_rate) / 2
@@ -1088,9 +1425,9 @@ class DataAnalyzer:
                     adjusted_intervals = default_intervals
                     adjusted_labels = default_labels
 
-                cost_rate_intervals = pd.cut(cost_rates, bins=adjusted_intervals, labels=adjusted_labels, right=False, include_lowest=True)
+                cost_rate_intervals = self._bin_cost_rates(cost_rates, adjusted_intervals, adjusted_labels)
                 distribution_data, value_distribution_data, interval_details = self._calculate_interval_statistics(
-                    data, cost_rate_intervals, value_fields, 'default'
+                    data, cost_rate_intervals, value_fields, 'default', col_sums
                 )
 
                 division_methods.append({
@@ -1103,7 +1440,7 @@ class DataAnalyzer:
                     'intervals_info': {
                         'intervals': default_intervals,
                         'labels': default_labels,
-                        'range': f'{cost_rates.min():.1%} - {cost_rates.max():.1%}'
+                        'range': rate_range
                     }
                 })
             except Exception as e:
@@ -1134,6 +1471,23 @@ class DataAnalyzer:
             'intervals_info': default_method.get('intervals_info', {})
         }
 
+    @staticmethod
+    def _bin_cost_rates(cost_rates: pd.Series, intervals, labels) -> pd.Series:
+        """按左闭右开区间给成本率分箱
+
+        等价于pd.cut(..., right=False, include_lowest=True)，但用searchsorted
+        二分定位编码，省去pandas构造Interval对象的开销；每种划分方法只对
+        成本率数组扫一次。越界值编码为-1（对应pd.cut的NaN）。
+        """
+        arr = cost_rates.to_numpy(dtype='float64')
+        inner_bounds = np.asarray(intervals[1:-1], dtype='float64')
+        if np.any(np.diff(np.asarray(intervals, dtype='float64')) <= 0):
+            raise ValueError('bins must increase monotonically')
+        codes = np.searchsorted(inner_bounds, arr, side='right')
+        codes[(arr < intervals[0]) | (arr >= intervals[-1])] = -1
+        return pd.Series(pd.Categorical.from_codes(codes, categories=labels),
+                         index=cost_rates.index)
+
     def _get_available_value_fields(self, data: pd.DataFrame):
         """获取可用的价值字段配置"""
         value_fields = [
@@ -1187,9 +1541,9 @@ class DataAnalyzer:
         # 1. 等频划分（四分位数）- 推荐方法
         if max_rate - min_rate >= 0.01:  # 降低阈值，数据范围足够大
             try:
-                q25 = cost_rates.quantile(0.25)
-                q50 = cost_rates.quantile(0.50)
-                q75 = cost_rates.quantile(0.75)
+                # 三个分位点一次算完：np.quantile单趟处理，避免三次独立的排序选择
+                q25, q50, q75 = (float(value) for value in
+                                 np.quantile(cost_rates.to_numpy(dtype='float64'), [0.25, 0.50, 0.75]))
 
                 # 构建初始区间，确保包含数据范围
                 intervals = [max(0, min_rate - 0.001), q25, q50, q75, min(1.0, max_rate + 0.001)]
@@ -1342,134 +1696,175 @@ class DataAnalyzer:
         return labels
 
     def _calculate_interval_statistics(self, data: pd.DataFrame, cost_rate_intervals: pd.Series,
-                                     value_fields, method_type: str):
-        """计算区间统计数据，支持多维度价值分析"""
-        interval_stats = cost_rate_intervals.value_counts().sort_index()
+                                     value_fields, method_type: str, col_sums=None):
+        """计算区间统计数据，支持多维度价值分析
+
+        col_sums: 各价值列的全列总和缓存（列名->float）。同一批数据会按多种
+        划分方法重复调用本函数，总和由调用方算一次传入，避免逐方法重复归约。
+        """
+        labels = list(cost_rate_intervals.cat.categories)
+        n_bins = len(labels)
         group_column = self._get_group_column('product')
 
-        distribution_data = []
-        value_distribution_data = {}
-        interval_details = {}
+        # 区间编码铺回data的行位置：计数与各价值列的区间求和全部用bincount
+        # 一趟算完，循环内不再对整列做逐区间的等值比较
+        codes = np.full(len(data), -1, dtype=np.int64)
+        positions = data.index.get_indexer(cost_rate_intervals.index)
+        codes[positions] = cost_rate_intervals.cat.codes.to_numpy()
+        valid = codes >= 0
+        valid_codes = codes[valid]
+
+        counts = np.bincount(valid_codes, minlength=n_bins)
+        total_rows = len(cost_rate_intervals)
+        count_percentages = np.round(counts / total_rows * 100, 2)
+
+        # 行位置按区间编码一次stable argsort后np.split切开：每个区间拿到
+        # 现成的位置数组，循环内不再对codes做逐区间的全长等值扫描
+        order = np.argsort(codes, kind='stable')
+        invalid_count = len(codes) - len(valid_codes)
+        bin_positions = np.split(order[invalid_count:], np.cumsum(counts)[:-1])
+
+        distribution_data = [
+            {'interval': str(interval), 'count': int(count), 'percentage': float(percentage)}
+            for interval, count, percentage in zip(labels, counts, count_percentages)
+        ]
 
-        # 初始化价值分布数据结构
+        # 各价值列的区间和/全列总和/盈亏拆分在区间循环外一次备好
+        field_stats = {}
         for field in value_fields:
-            value_distribution_data[field['key']] = []
-
-        for interval, count in interval_stats.items():
-            interval_name = str(interval)
-            interval_mask = cost_rate_intervals == interval
-            interval_data = data[interval_mask]
-
-            # 基础分布数据（项目数量）
-            distribution_item = {
-                'interval': interval_name,
-                'count': int(count),
-                'percentage': round(count / len(cost_rate_intervals) * 100, 2)
+            if field['key'] == 'count' or 'column' not in field or field['column'] not in data.columns:
+                continue
+            column = field['column']
+            arr = data[column].to_numpy(dtype='float64')
+            arr_valid = np.nan_to_num(arr[valid])
+            stats = {
+                'sums': np.bincount(valid_codes, weights=arr_valid, minlength=n_bins),
+                'column_total': (col_sums[column] if col_sums is not None and column in col_sums
+                                 else float(np.nansum(arr)))
             }
-            distribution_data.append(distribution_item)
-
-            # 价值维度分布数据
-            for field in value_fields:
-                if field['key'] == 'count':
-                    # 项目数量
-                    value_item = {
-                        'interval': interval_name,
-                        'value': int(count),
-                        'percentage': round(count / len(cost_rate_intervals) * 100, 2)
-                    }
-                else:
-                    # 其他价值字段（销售额、利润等）
-                    column = field['column']
-                    if column in interval_data.columns:
-                        total_value = interval_data[column].sum()
-
-                        # 计算盈利和亏损分布（仅对利润字段）
-                        if field['key'] == 'profit':
-                            profit_data = interval_data[column]
-                            profit_sum = profit_data[profit_data > 0].sum()
-                            loss_sum = abs(profit_data[profit_data < 0].sum())
-
-                            value_item = {
-                                'interval': interval_name,
-                                'value': round(total_value, 2),
-                                'profit_value': round(profit_sum, 2),
-                                'loss_value': round(loss_sum, 2),
-                                'percentage': round(total_value / data[column].sum() * 100, 2) if data[column].sum() != 0 else 0
-                            }
-                        else:
-                            value_item = {
-                                'interval': interval_name,
-                                'value': round(total_value, 2),
-                                'percentage': round(total_value / data[column].sum() * 100, 2) if data[column].sum() != 0 else 0
-                            }
-                    else:
-                        value_item = {
-                            'interval': interval_name,
-                            'value': 0,
-                            'percentage': 0
-                        }
-
-                value_distribution_data[field['key']].append(value_item)
-
-            # 详细数据（用于下钻）
-            items = []
-            for _, row in interval_data.iterrows():
-                item = {
-                    'name': row[group_column],
-                    'cost_rate': round(row['成本率'], 4),
-                }
+            if field['key'] == 'profit':
+                stats['profit_sums'] = np.bincount(
+                    valid_codes, weights=np.where(arr_valid > 0, arr_valid, 0.0), minlength=n_bins)
+                stats['loss_sums'] = np.bincount(
+                    valid_codes, weights=np.where(arr_valid < 0, arr_valid, 0.0), minlength=n_bins)
+            field_stats[field['key']] = stats
 
-                # 添加所有可用的价值字段
-                for field in value_fields:
-                    if field['key'] != 'count' and 'column' in field:
-                        column = field['column']
-                        if column in row:
-                            item[field['key']] = round(row[column], 2)
+        interval_names = [str(interval) for interval in labels]
 
-                # 添加其他有用字段
-                if 'amount' in self.field_mapping:
-                    item['amount'] = round(row[self.field_mapping['amount']], 2)
-                if 'quantity' in self.field_mapping:
-                    item['quantity'] = round(row[self.field_mapping['quantity']], 2)
+        # 价值分布按字段整列物化：区间对齐的数组已算好，只在序列化边界
+        # 一次性生成字典列表，不再逐区间逐字段append小字典
+        value_distribution_data = {}
+        for field in value_fields:
+            key = field['key']
+            if key == 'count':
+                value_distribution_data[key] = [
+                    {'interval': name, 'value': int(count), 'percentage': float(percentage)}
+                    for name, count, percentage in zip(interval_names, counts, count_percentages)
+                ]
+                continue
+            stats = field_stats.get(key)
+            if stats is None:
+                value_distribution_data[key] = [
+                    {'interval': name, 'value': 0, 'percentage': 0} for name in interval_names
+                ]
+                continue
+            column_total = stats['column_total']
+            # 提前转原生float：numpy标量会拖慢下游JSON编码
+            percentages = ([round(float(value) / column_total * 100, 2) for value in stats['sums']]
+                           if column_total != 0 else [0] * n_bins)
+            if key == 'profit':
+                # 盈利和亏损拆分仅利润字段输出
+                value_distribution_data[key] = [
+                    {
+                        'interval': name,
+                        'value': round(float(value), 2),
+                        'profit_value': round(float(profit_value), 2),
+                        'loss_value': round(abs(float(loss_value)), 2),
+                        'percentage': percentage
+                    }
+                    for name, value, profit_value, loss_value, percentage in zip(
+                        interval_names, stats['sums'], stats['profit_sums'],
+                        stats['loss_sums'], percentages)
+                ]
+            else:
+                value_distribution_data[key] = [
+                    {'interval': name, 'value': round(float(value), 2), 'percentage': percentage}
+                    for name, value, percentage in zip(interval_names, stats['sums'], percentages)
+                ]
 
-                items.append(item)
+        interval_details = {}
 
-            # 按成本率降序排序
-            items.sort(key=lambda x: x['cost_rate'], reverse=True)
-            interval_details[interval_name] = items
+        # 下钻明细的取值列在循环外解析一次：除名称和成本率外，其余列统一round(2)
+        detail_specs = [
+            (field['key'], field['column'])
+            for field in value_fields
+            if field['key'] != 'count' and 'column' in field and field['column'] in data.columns
+        ]
+        for extra_key in ('amount', 'quantity'):
+            if extra_key in self.field_mapping:
+                detail_specs.append((extra_key, self.field_mapping[extra_key]))
+        # 明细列整列一次转list并round（保持Python round的十进制舍入结果，
+        # np.round在边界值上会偏一分），循环内只按行位置取现成值拼字典
+        name_all = data[group_column].tolist()
+        cost_rate_all = [round(value, 4) for value in data['成本率'].tolist()]
+        detail_values_all = [
+            (key, [round(value, 2) for value in data[column].tolist()])
+            for key, column in detail_specs
+        ]
+        cost_rate_sort_key = np.asarray(cost_rate_all, dtype='float64')
+
+        for bin_idx, interval_name in enumerate(interval_names):
+            # 详细数据（用于下钻）：按成本率降序，stable argsort保持并列时的原行序
+            positions = bin_positions[bin_idx]
+            ordered = positions[np.argsort(-cost_rate_sort_key[positions], kind='stable')]
+            interval_details[interval_name] = [
+                {
+                    'name': name_all[pos],
+                    'cost_rate': cost_rate_all[pos],
+                    **{key: values[pos] for key, values in detail_values_all}
+                }
+                for pos in ordered
+            ]
 
         return distribution_data, value_distribution_data, interval_details
 
     def _cost_efficiency_analysis(self, data: pd.DataFrame, analysis_type: str) -> Dict[str, Any]:
         """成本效率分析"""
         # 根据分析类型选择效率指标
-        efficiency_field_map = {
-            'product': 'quantity',  # 成本率 vs 销量
-            'customer': 'amount',   # 成本率 vs 采购金额
-            'region': 'amount'      # 成本率 vs 销售金额
-        }
-
-        efficiency_field = efficiency_field_map[analysis_type]
+        efficiency_field = _EFFICIENCY_FIELD_MAP[analysis_type]
 
         if '成本率' not in data.columns or efficiency_field not in self.field_mapping:
             return {'error': '缺少成本效率分析所需字段'}
 
         efficiency_column = self.field_mapping[efficiency_field]
 
-        # 计算平均值用于分类
-        avg_cost_rate = data['成本率'].mean()
-        avg_efficiency = data[efficiency_column].mean()
-
-        # 准备散点图数据
-        scatter_data = []
-        for _, row in data.iterrows():
-            if pd.notna(row['成本率']) and pd.notna(row[efficiency_column]):
-                scatter_data.append({
-                    'cost_rate': float(row['成本率']),
-                    'efficiency_value': float(row[efficiency_column]),
-                    'name': row[self._get_group_column(analysis_type)],
-                    'quadrant': self._classify_cost_efficiency(row['成本率'], row[efficiency_column], avg_cost_rate, avg_efficiency)
-                })
+        group_column = self._get_group_column(analysis_type)
+
+        # 准备散点图数据：列数组一次性提取，空值过滤在numpy层完成，避免逐行iterrows
+        cost_rate_arr = data['成本率'].to_numpy(dtype=np.float64)
+        efficiency_arr = data[efficiency_column].to_numpy(dtype=np.float64)
+        name_arr = data[group_column].to_numpy()
+
+        # 分类用的平均值直接在已提取的数组上求，不再让pandas各扫一遍列
+        avg_cost_rate = np.nanmean(cost_rate_arr) if cost_rate_arr.size else float('nan')
+        avg_efficiency = np.nanmean(efficiency_arr) if efficiency_arr.size else float('nan')
+        valid = ~(np.isnan(cost_rate_arr) | np.isnan(efficiency_arr))
+
+        quadrant_arr = self._classify_cost_efficiency_vec(
+            cost_rate_arr[valid], efficiency_arr[valid], avg_cost_rate, avg_efficiency)
+
+        # tolist()在C层一次性转成原生Python对象，省去逐元素float()调用
+        scatter_data = [
+            {
+                'cost_rate': cost_rate,
+                'efficiency_value': efficiency_value,
+                'name': name,
+                'quadrant': quadrant
+            }
+            for cost_rate, efficiency_value, name, quadrant in zip(
+                cost_rate_arr[valid].tolist(), efficiency_arr[valid].tolist(),
+                name_arr[valid].tolist(), quadrant_arr.tolist())
+        ]
 
         return {
             'scatter_data': scatter_data,
@@ -1479,8 +1874,18 @@ class DataAnalyzer:
             'avg_efficiency': float(avg_efficiency)
         }
 
+    def _classify_cost_efficiency_vec(self, cost_rate_arr: np.ndarray, efficiency_arr: np.ndarray,
+                                      avg_cost_rate: float, avg_efficiency: float) -> np.ndarray:
+        """成本效率象限分类（整列版）：布尔算术编码象限后查标签表"""
+        # 两次比较直接算出0-3的象限编码，再一次花式索引取标签，
+        # 比np.select逐条件多次扫描少几趟内存遍历
+        high_cost = cost_rate_arr >= avg_cost_rate
+        low_efficiency = efficiency_arr <= avg_efficiency
+        codes = high_cost.astype(np.int8) * 2 + low_efficiency.astype(np.int8)
+        return _EFFICIENCY_QUADRANT_LABELS[codes]
+
     def _classify_cost_efficiency(self, cost_rate: float, efficiency_value: float, avg_cost_rate: float, avg_efficiency: float) -> str:
-        """成本效率象限分类"""
+        """成本效率象限分类（单值版，保留给外部调用兼容）"""
         if cost_rate < avg_cost_rate and efficiency_value > avg_efficiency:  # 低成本高效率
             return 'efficient'
         elif cost_rate < avg_cost_rate and efficiency_value <= avg_efficiency:  # 低成本低效率
@@ -1492,29 +1897,26 @@ class DataAnalyzer:
 
     def _get_efficiency_label(self, analysis_type: str) -> str:
         """获取效率指标标签"""
-        labels = {
-            'product': '销量(吨)',
-            'customer': '采购金额(万元)',
-            'region': '销售金额(万元)'
-        }
-        return labels.get(analysis_type, '效率指标')
+        return _EFFICIENCY_LABELS.get(analysis_type, '效率指标')
 
     def _get_group_column(self, analysis_type: str) -> str:
-        """获取分组列名"""
-        group_field_map = {
-            'product': 'product',
-            'customer': 'customer',
-            'region': 'region'
-        }
+        """获取分组列名（按analysis_type缓存解析结果，避免重复扫描field_mapping）"""
+        cached = self._group_column_cache.get(analysis_type)
+        if cached is not None:
+            return cached
 
-        field_key = group_field_map.get(analysis_type)
+        field_key = _GROUP_FIELD_MAP.get(analysis_type)
         if field_key and field_key in self.field_mapping:
-            return self.field_mapping[field_key]
-
-        # 如果没有找到对应字段，返回第一个可用的字段
-        for field_key in ['product', 'customer', 'region']:
-            if field_key in self.field_mapping:
-                return self.field_mapping[field_key]
+            resolved = self.field_mapping[field_key]
+        else:
+            # 如果没有找到对应字段，返回第一个可用的字段
+            for field_key in ['product', 'customer', 'region']:
+                if field_key in self.field_mapping:
+                    resolved = self.field_mapping[field_key]
+                    break
+            else:
+                # 最后的备选方案
+                resolved = self.raw_data.columns[0] if len(self.raw_data.columns) > 0 else 'unknown'
 
-        # 最后的备选方案
-        return list(self.raw_data.columns)[0] if len(self.raw_data.columns) > 0 else 'unknown'
+        self._group_column_cache[analysis_type] = resolved
+        return resolved
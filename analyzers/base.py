@@ -23,7 +23,8 @@ class BaseAnalyzer(ABC):
             data: 待分析的数据框
             field_mapping: 字段映射字典
         """
-        self.data = data.copy() if data is not None else pd.DataFrame()
+        # 浅拷贝即可：分析器只做整列赋值，不会触碰调用方frame的底层数据
+        self.data = data.copy(deep=False) if data is not None else pd.DataFrame()
         self.field_mapping = field_mapping or {}
         self.result = {}
         
@@ -91,11 +92,8 @@ class BaseAnalyzer(ABC):
         Returns:
             pd.DataFrame: 处理后的数据
         """
-        # 基础数据清理
-        cleaned_data = self.data.copy()
-        
-        # 移除空行
-        cleaned_data = cleaned_data.dropna(how='all')
+        # 基础数据清理：dropna本身返回新frame，无需先深拷贝一份
+        cleaned_data = self.data.dropna(how='all')
         
         # 应用字段映射
         if self.field_mapping:
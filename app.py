@@ -199,9 +199,13 @@ def analyze_data():
         analysis_results[file_id]['unit_confirmations'] = unit_confirmations
         analysis_results[file_id]['pareto_dimension'] = pareto_dimension
 
+        # 行级processed_data只有Excel导出用到（走服务端存储的完整结果），
+        # 前端不消费；HTTP响应里剔除，省掉最大一块JSON编码和传输开销
+        response_result = {key: value for key, value in result.items() if key != 'processed_data'}
+
         return jsonify({
             'success': True,
-            'data': result,
+            'data': response_result,
             'message': '分析完成'
         })
 
@@ -11,6 +11,7 @@ Date: 2025-07-15
 import os
 import re
 import json
+import functools
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Any
@@ -65,11 +66,13 @@ def clean_column_name(column_name: str) -> str:
 
     return cleaned
 
+@functools.lru_cache(maxsize=1)
 def get_field_aliases() -> Dict[str, List[str]]:
     """
     获取字段别名映射
     按优先级排序，优先级高的在前面
-    
+    （结果缓存复用，调用方只读，不要修改返回的字典）
+
     Returns:
         Dict[str, List[str]]: 字段别名映射
     """
@@ -88,9 +91,10 @@ def get_field_aliases() -> Dict[str, List[str]]:
         'category': ['物料基本分类', '分类', '类别', '产品分类', '商品分类', '品类', '产品类型', '商品类型']
     }
 
+@functools.lru_cache(maxsize=512)
 def detect_field_type(column_name: str) -> str:
     """
-    根据列名检测字段类型
+    根据列名检测字段类型（纯列名函数，结果按列名缓存）
 
     Args:
         column_name: 列名
@@ -269,10 +273,12 @@ def calculate_quadrant(x_value: float, y_value: float, x_avg: float, y_avg: floa
     else:
         return 4  # 第四象限：高X，低Y (金牛产品)
 
+@functools.lru_cache(maxsize=8)
 def get_quadrant_info(analysis_type: str) -> Dict[int, Dict[str, str]]:
     """
     获取象限信息配置
-    
+    （结果缓存复用，调用方只读，不要修改返回的字典）
+
     Args:
         analysis_type: 分析类型
         
@@ -360,27 +366,36 @@ def safe_to_dict(df: pd.DataFrame) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: 转换后的字典列表
     """
-    # 将NaN值替换为None，这样可以被JSON序列化
-    df_clean = df.replace({np.nan: None, np.inf: None, -np.inf: None})
-
-    # 转换为字典列表
-    records = df_clean.to_dict('records')
-
-    # 进一步清理数据，确保所有值都可以JSON序列化
-    cleaned_records = []
-    for record in records:
-        cleaned_record = {}
-        for key, value in record.items():
-            if pd.isna(value) or value is np.nan:
-                cleaned_record[key] = None
-            elif isinstance(value, (np.integer, np.floating)):
-                # 转换numpy数值类型为Python原生类型
-                if np.isfinite(value):
-                    cleaned_record[key] = float(value) if isinstance(value, np.floating) else int(value)
+    # 逐列向量化清洗后再拼装records，避免逐单元格的类型判断和整表replace拷贝
+    column_values = []
+    for col in df.columns:
+        series = df[col]
+        dtype = series.dtype
+        if pd.api.types.is_float_dtype(dtype):
+            # 浮点列：NaN/inf统一置None，其余装箱为原生float
+            arr = series.to_numpy(dtype='float64')
+            values = arr.astype(object)
+            values[~np.isfinite(arr)] = None
+            column_values.append(values.tolist())
+        elif (pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)) \
+                and not series.hasnans:
+            # 整数/布尔列没有缺失值，直接转原生类型
+            column_values.append(series.tolist())
+        else:
+            # 其余列（字符串、分类、混合对象等）逐值清理
+            cleaned = []
+            for value in series.tolist():
+                if value is None or pd.isna(value):
+                    cleaned.append(None)
+                elif isinstance(value, (np.integer, np.floating)):
+                    # 转换numpy数值类型为Python原生类型
+                    if np.isfinite(value):
+                        cleaned.append(float(value) if isinstance(value, np.floating) else int(value))
+                    else:
+                        cleaned.append(None)
                 else:
-                    cleaned_record[key] = None
-            else:
-                cleaned_record[key] = value
-        cleaned_records.append(cleaned_record)
+                    cleaned.append(value)
+            column_values.append(cleaned)
 
-    return cleaned_records
+    columns = list(df.columns)
+    return [dict(zip(columns, row)) for row in zip(*column_values)]